@@ -10,6 +10,8 @@ It provides functionality to:
 3. Parse and process Claude's output including JSON results
 4. Extract only the investment memo content from responses
 5. Handle errors and provide detailed error messages
+6. Optionally cache portfolio allocation responses on disk so an identical prompt
+   over unchanged memos is not re-run
 
 The module uses prompt templates that contain placeholders like {{TICKER}},
 {{COMPANY}}, {{DATE}}, and {{STOCK_JSON_DATA}} which are dynamically
@@ -17,15 +19,102 @@ replaced with actual data before sending to Claude.
 """
 
 import os
-import json
+import io
+import re
+import csv
+import shlex
+import hashlib
+import random
+import sqlite3
+import time
+import orjson
 import subprocess
-import tempfile
 import logging
+import threading
 import datetime
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+
+from rate_limiter import RateLimiter
 
 logger = logging.getLogger("stock_analyzer")
 
+# Matches {{PLACEHOLDER}} markers in prompt templates
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+# Heading that starts every investment memo; anything Claude writes before it is dropped
+MEMO_HEADING = "# Investment Memorandum"
+
+# Claude CLI errors worth retrying: rate limits, overloaded or failing backend
+_TRANSIENT_ERROR_RE = re.compile(r"rate.?limit|overloaded|\b5\d\d\b|timed? ?out", re.IGNORECASE)
+
+# Prompt size budget, kept below Claude's 200K token context window to leave room
+# for the response. Tokens are estimated from characters (JSON averages well above
+# 3 characters per token), which avoids needing a tokenizer
+MAX_PROMPT_TOKENS = 180_000
+_CHARS_PER_TOKEN = 3
+
+# Stock data sections dropped, in order, when a memo prompt exceeds the budget
+_COMPACTION_ORDER = ("insiderTransactions", "owners", "members", "statements")
+
+# Stock data keys that carry no analytical signal and only cost prompt tokens
+_PROMPT_EXCLUDED_KEYS = frozenset({"id", "__typename"})
+
+
+def _split_command(command: str) -> List[str]:
+    """Split a command line into an argv list
+
+    POSIX shlex rules treat backslashes as escapes, which would mangle Windows
+    paths such as C:\\Users\\me\\claude.cmd, so Windows uses non-POSIX splitting and
+    strips the quotes that mode leaves around quoted arguments.
+
+    Args:
+        command: Command line, e.g. 'claude' or 'npx "@anthropic-ai/claude-code"'
+
+    Returns:
+        List of command arguments
+    """
+    if os.name != "nt":
+        return shlex.split(command)
+
+    return [
+        arg[1:-1] if len(arg) >= 2 and arg[0] == arg[-1] and arg[0] in "\"'" else arg
+        for arg in shlex.split(command, posix=False)
+    ]
+
+
+def _minify_stock_data(value: Any) -> Any:
+    """Strip fields that add prompt tokens without adding information
+
+    Removes excluded keys, null values and empty lists/dicts at every level of the
+    stock data. Numeric values are left untouched so figures reach Claude exactly
+    as reported by the API.
+
+    Args:
+        value: Stock data (or a nested part of it)
+
+    Returns:
+        Copy of the data without the stripped fields
+    """
+    if isinstance(value, dict):
+        minified = {}
+        for key, item in value.items():
+            if key in _PROMPT_EXCLUDED_KEYS:
+                continue
+            item = _minify_stock_data(item)
+            if item is None or item == [] or item == {}:
+                continue
+            minified[key] = item
+        return minified
+
+    if isinstance(value, list):
+        return [
+            item
+            for item in map(_minify_stock_data, value)
+            if item is not None and item != [] and item != {}
+        ]
+
+    return value
+
 
 class ClaudeIntegration:
     """Interface for generating investment memos using Claude
@@ -42,65 +131,188 @@ class ClaudeIntegration:
     heading for consistent formatting.
     """
 
-    def __init__(self, prompt_dir: str, claude_command: Optional[str] = None):
+    # Prompts embed the current date, so entries mostly help re-runs on the same day;
+    # older entries are ignored after a week
+    RESPONSE_CACHE_TTL = 7 * 24 * 60 * 60
+
+    # Attempts per Claude call before giving up on transient failures
+    MAX_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        prompt_dir: str,
+        claude_command: Optional[str] = None,
+        max_concurrent_calls: int = 3,
+        max_calls_per_hour: Optional[int] = None,
+        response_cache_path: Optional[str] = None,
+        light_model: Optional[str] = None,
+        timeout: float = 900.0,
+    ):
         """Initialize with paths to prompt files
 
         Args:
             prompt_dir: Directory containing prompt templates
             claude_command: Command to invoke Claude CLI (defaults to 'claude')
+            max_concurrent_calls: Maximum number of Claude processes running at once
+                                  when memos are generated from multiple threads
+            max_calls_per_hour: Optional cap on Claude calls per rolling hour; calls
+                                beyond the cap wait for a free slot instead of failing
+            response_cache_path: Optional path to a SQLite database used to reuse portfolio
+                                 allocation responses to identical prompts across runs.
+                                 Memos are never cached, so deleting a memo file
+                                 always regenerates it
+            light_model: Optional cheaper model (e.g. 'haiku') used for stocks where
+                         only minimal data is available
+            timeout: Seconds to wait for a single Claude call before it is killed
+                     and retried (default: 900)
+
+        Raises:
+            ValueError: If max_concurrent_calls is less than 1 or timeout is not a
+                        positive number of seconds
         """
+        if max_concurrent_calls < 1:
+            raise ValueError("max_concurrent_calls must be at least 1")
+        if not 0 < timeout < float("inf"):
+            raise ValueError("timeout must be a finite number of seconds greater than 0")
+
         self.prompt_dir = prompt_dir
         self.claude_command = claude_command or "claude"
 
-        # Validate investment memo prompt file exists
+        # Build the argv once; quoting in commands such as 'npx "@anthropic-ai/claude-code"'
+        # is honoured, which a plain split would break
+        self._command = _split_command(self.claude_command) + ["-p", "--output-format", "json"]
+        self.light_model = light_model
+        self.timeout = timeout
+
+        # Bound the number of Claude processes independently of the number of workers,
+        # so stock data fetching can run wider than memo generation
+        self._call_slots = threading.BoundedSemaphore(max_concurrent_calls)
+
+        # Pace calls ahead of time so a burst of workers cannot exhaust the usage limit
+        self._rate_limiter = RateLimiter(max_calls_per_hour, 3600.0) if max_calls_per_hour else None
+
+        # Load the investment memo template once - it is reused for every stock
         self.memo_prompt_path = os.path.join(prompt_dir, "investment-memo.md")
-        if not os.path.exists(self.memo_prompt_path):
-            raise FileNotFoundError(f"Investment memo template not found: {self.memo_prompt_path}")
+        self._memo_template = self._load_template(self.memo_prompt_path, "Investment memo")
 
-        # Validate portfolio allocation prompt file exists
+        # Load the portfolio allocation template
         self.portfolio_prompt_path = os.path.join(prompt_dir, "portfolio-allocation.md")
-        if not os.path.exists(self.portfolio_prompt_path):
-            raise FileNotFoundError(f"Portfolio allocation template not found: {self.portfolio_prompt_path}")
+        self._portfolio_template = self._load_template(self.portfolio_prompt_path, "Portfolio allocation")
+
+        # Persistent prompt -> response cache (shared between worker threads); opened last so a
+        # missing template cannot leave the connection open
+        self._cache_lock = threading.Lock()
+        self._response_cache = None
+        if response_cache_path:
+            self._response_cache = sqlite3.connect(response_cache_path, check_same_thread=False)
+            self._response_cache.execute("PRAGMA journal_mode=WAL")
+            self._response_cache.execute(
+                "CREATE TABLE IF NOT EXISTS claude_response "
+                "(prompt_hash TEXT PRIMARY KEY, response TEXT NOT NULL, cached_at REAL NOT NULL)"
+            )
+            # Prompts change whenever the stock data or date changes, so old entries can
+            # never be hit again - drop expired ones instead of letting the cache grow
+            self._response_cache.execute(
+                "DELETE FROM claude_response WHERE cached_at < ?",
+                (time.time() - self.RESPONSE_CACHE_TTL,),
+            )
+            self._response_cache.commit()
 
-    def _extract_company_info(
-        self, stock_data: Dict[str, Any], company_name: str = ""
-    ) -> Tuple[str, str]:
-        """Extract ticker symbol and company name from stock data
+    def __enter__(self) -> "ClaudeIntegration":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release resources held by the integration"""
+        if self._response_cache is not None:
+            with self._cache_lock:
+                self._response_cache.close()
+                self._response_cache = None
+
+    def _get_cached_response(self, prompt_hash: str) -> Optional[str]:
+        """Get a previous Claude response for the same prompt
 
         Args:
-            stock_data: Stock data from API
-            company_name: Optional company name from watchlist
+            prompt_hash: Hash of the command and prompt
 
         Returns:
-            Tuple of (ticker_symbol, company_name)
+            Cached response text, or None if missing or expired
+        """
+        if self._response_cache is None:
+            return None
+
+        with self._cache_lock:
+            row = self._response_cache.execute(
+                "SELECT response, cached_at FROM claude_response WHERE prompt_hash = ?", (prompt_hash,)
+            ).fetchone()
+
+        if row is None or time.time() - row[1] > self.RESPONSE_CACHE_TTL:
+            return None
+
+        return row[0]
+
+    def _cache_response(self, prompt_hash: str, response: str) -> None:
+        """Store a Claude response in the response cache
+
+        Args:
+            prompt_hash: Hash of the command and prompt
+            response: Processed response text
         """
-        ticker_symbol = ""
-        extracted_company_name = company_name or ""
+        if self._response_cache is None:
+            return
+
+        with self._cache_lock:
+            self._response_cache.execute(
+                "INSERT OR REPLACE INTO claude_response (prompt_hash, response, cached_at) VALUES (?, ?, ?)",
+                (prompt_hash, response, time.time()),
+            )
+            self._response_cache.commit()
+
+    def _load_template(self, template_path: str, description: str) -> str:
+        """Read a prompt template from disk
+
+        Args:
+            template_path: Path to prompt template file (.md format)
+            description: Human readable template name used in error messages
 
+        Returns:
+            Template text
+
+        Raises:
+            FileNotFoundError: If the template file does not exist
+        """
         try:
-            # Ensure we have valid stock data
-            if not stock_data:
-                logger.warning("Stock data is empty or None")
-                return ticker_symbol, extracted_company_name
+            with open(template_path, "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"{description} template not found: {template_path}")
 
-            # Get ticker symbol from API data
-            symbol = stock_data.get("tickerSymbol", "")
-            if symbol:
-                ticker_symbol = symbol
+    def _ticker_info(
+        self, stock_data: Dict[str, Any], company_name: str = ""
+    ) -> Tuple[str, str, str]:
+        """Extract ticker symbol, exchange-qualified ticker and company name from stock data
+
+        Args:
+            stock_data: Stock data from API
+            company_name: Optional company name from watchlist (preferred over the API name)
 
-            # If company name wasn't provided from watchlist, try to get from API
-            if not extracted_company_name:
-                extracted_company_name = stock_data.get("name", "")
-        except Exception as e:
-            logger.warning(f"Error extracting company info: {str(e)}")
+        Returns:
+            Tuple of (ticker_symbol, full_ticker, company_name), where full_ticker is
+            "EXCHANGE:TICKER" when the exchange is known
+        """
+        ticker_symbol = stock_data.get("tickerSymbol") or ""
+        exchange = stock_data.get("exchangeSymbol") or ""
+        full_ticker = f"{exchange}:{ticker_symbol}" if exchange and ticker_symbol else ticker_symbol
 
-        return ticker_symbol, extracted_company_name
+        return ticker_symbol, full_ticker, company_name or stock_data.get("name", "")
 
-    def _prepare_prompt(self, template_path: str, replacements: Dict[str, str] = None) -> str:
+    def _prepare_prompt(self, template: str, replacements: Dict[str, str] = None) -> str:
         """Prepare prompt by replacing placeholders in the template
 
-        This method loads a prompt template from file and replaces placeholder
-        values with actual data. The template uses double curly braces for
+        This method takes a prompt template loaded at initialization and replaces
+        placeholder values with actual data. The template uses double curly braces for
         placeholders (e.g., {{TICKER}}, {{COMPANY}}, {{DATE}}, {{STOCK_JSON_DATA}}).
 
         The prompt templates (investment-memo.md, investment-memo-with.md, etc.)
@@ -109,7 +321,7 @@ class ClaudeIntegration:
         financial analysis, valuation, investment thesis, and final recommendation.
 
         Args:
-            template_path: Path to prompt template file (.md format)
+            template: Prompt template text
             replacements: Dictionary of replacements where:
                 - keys are placeholder names without braces (e.g., "TICKER")
                 - values are the actual data to insert (e.g., "AAPL")
@@ -117,107 +329,147 @@ class ClaudeIntegration:
         Returns:
             Processed prompt text with all placeholders replaced
         """
-        with open(template_path, "r") as f:
-            template = f.read()
-
-        # Apply replacements if provided
+        # Apply all replacements in a single pass over the template; unknown
+        # placeholders are left untouched
         if replacements:
-            for placeholder, value in replacements.items():
-                template = template.replace(f"{{{{{placeholder}}}}}", value)
+            return _PLACEHOLDER_RE.sub(
+                lambda match: replacements.get(match.group(1), match.group(0)), template
+            )
 
         return template
 
-    def _run_claude(self, prompt: str) -> str:
-        """Run Claude with the given prompt
+    def _execute_command(self, command: List[str], prompt: str) -> Dict[str, Any]:
+        """Run the Claude CLI, retrying transient failures with exponential backoff
+
+        A call is retried when it times out, produces no output or output that is
+        not valid JSON (e.g. truncated), or exits with an error that looks transient
+        (rate limit, overloaded or 5xx backend).
 
         Args:
-            prompt: Prompt text for Claude
+            command: Claude command line
+            prompt: Prompt text passed on stdin
 
         Returns:
-            Claude's response
+            Parsed JSON output of the successful call
 
         Raises:
-            RuntimeError: If Claude command fails
+            RuntimeError: If the call fails permanently or all attempts fail
         """
-        # Create temporary file for prompt
-        with tempfile.NamedTemporaryFile("w", suffix=".md", delete=False) as prompt_file:
-            prompt_file.write(prompt)
-            prompt_file_path = prompt_file.name
-
-        try:
-            # Parse the base claude command to handle both simple and complex forms
-            command_parts = self.claude_command.split()
-
-            # Build the command with JSON output format
-            command = f"{' '.join(command_parts)} -p --output-format json < {prompt_file_path}"
-
-            # Log the full command that will be executed
-            logger.info(f"Executing Claude command: {command}")
-            logger.debug(f"Prompt file: {prompt_file_path}")
-
-            # Run the command with shell=True to enable redirection
-            result = subprocess.run(
-                command,
-                shell=True,  # Required for redirection
-                check=False,  # Don't raise exception on non-zero exit
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
+        prompt_bytes = prompt.encode("utf-8")
 
-            # Check for errors
-            if result.returncode != 0:
-                error_msg = f"Claude command failed with exit code {result.returncode}.\n"
-                error_msg += f"STDOUT: {result.stdout}\n"
-                error_msg += f"STDERR: {result.stderr}"
-                logger.error(error_msg)
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            if self._rate_limiter:
+                self._rate_limiter.acquire()
 
-                # Raise an exception
+            # Run the command directly, passing the prompt on stdin
+            try:
+                with self._call_slots:
+                    # Output is kept as raw bytes and handed straight to orjson, avoiding a
+                    # separate decode of the whole response before parsing
+                    result = subprocess.run(
+                        command,
+                        input=prompt_bytes,
+                        check=False,  # Don't raise exception on non-zero exit
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        timeout=self.timeout,
+                    )
+            except subprocess.TimeoutExpired:
+                error_msg = f"Claude command timed out after {self.timeout:.0f} seconds"
+                retryable = True
+            else:
+                if result.returncode == 0 and result.stdout:
+                    try:
+                        return orjson.loads(result.stdout)
+                    except orjson.JSONDecodeError as e:
+                        error_msg = f"Failed to parse JSON response from Claude: {str(e)}"
+                        retryable = True
+                        # The raw response can be large, so only decode it when it will be logged
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Raw response: %s", result.stdout.decode("utf-8", errors="replace"))
+                elif result.returncode != 0:
+                    stderr = result.stderr.decode("utf-8", errors="replace")
+                    error_msg = f"Claude command failed with exit code {result.returncode}.\n"
+                    error_msg += f"STDOUT: {result.stdout.decode('utf-8', errors='replace')}\n"
+                    error_msg += f"STDERR: {stderr}"
+                    retryable = bool(_TRANSIENT_ERROR_RE.search(stderr))
+                else:
+                    error_msg = "Claude command produced no output"
+                    retryable = True
+
+            logger.error(error_msg)
+
+            if not retryable or attempt == self.MAX_ATTEMPTS:
                 raise RuntimeError(f"Claude command failed: {error_msg}")
 
-            # Parse JSON from stdout
-            if not result.stdout:
-                error_msg = "Claude command produced no output"
-                logger.error(error_msg)
-                raise RuntimeError(error_msg)
+            delay = 2 ** attempt + random.random()
+            logger.warning(
+                "Retrying Claude command in %.1f seconds (attempt %d/%d)",
+                delay,
+                attempt + 1,
+                self.MAX_ATTEMPTS,
+            )
+            time.sleep(delay)
 
-            try:
-                # Parse JSON response
-                json_response = json.loads(result.stdout)
-
-                # Extract content from the "result" field
-                if "result" not in json_response:
-                    error_msg = "Claude JSON output missing 'result' field"
-                    logger.error(error_msg)
-                    raise RuntimeError(error_msg)
-
-                # Log some stats if available
-                if "cost_usd" in json_response:
-                    logger.info(f"Claude request cost: ${json_response['cost_usd']:.6f}")
-                if "duration_ms" in json_response:
-                    logger.info(f"Claude request duration: {json_response['duration_ms']/1000:.2f} seconds")
-
-                # Extract only the content after the "# Investment Memorandum" heading
-                result = json_response["result"]
-                if "# Investment Memorandum" in result:
-                    result = "# Investment Memorandum" + result.split("# Investment Memorandum", 1)[1]
-
-                return result
-
-            except json.JSONDecodeError as e:
-                error_msg = f"Failed to parse JSON response from Claude: {str(e)}"
-                logger.error(error_msg)
-                logger.debug(f"Raw response: {result.stdout}")
-                raise RuntimeError(error_msg)
-
-        finally:
-            # Clean up temporary file
-            try:
-                if os.path.exists(prompt_file_path):
-                    os.unlink(prompt_file_path)
-            except Exception as e:
-                logger.warning(f"Failed to clean up temporary file: {str(e)}")
+    def _run_claude(self, prompt: str, model: Optional[str] = None, use_cache: bool = False) -> str:
+        """Run Claude with the given prompt
+
+        Args:
+            prompt: Prompt text for Claude
+            model: Optional model to use instead of the CLI default
+            use_cache: Reuse (and store) the response to an identical prompt in the
+                       response cache, when one is configured
+
+        Returns:
+            Claude's response
 
+        Raises:
+            RuntimeError: If Claude command fails
+        """
+        command = self._command + ["--model", model] if model else self._command
+
+        # Identical prompts (e.g. re-running the portfolio allocation over unchanged
+        # memos) reuse the previous response instead of paying for another call
+        prompt_hash = None
+        if use_cache and self._response_cache is not None:
+            prompt_hash = hashlib.blake2b(
+                "\0".join(command + [prompt]).encode("utf-8"), digest_size=16
+            ).hexdigest()
+            cached_response = self._get_cached_response(prompt_hash)
+            if cached_response is not None:
+                logger.warning(
+                    "Using cached Claude response for identical prompt "
+                    "(run with --no-claude-cache to force a fresh call)"
+                )
+                return cached_response
+
+        # Log the full command that will be executed
+        logger.info("Executing Claude command: %s", shlex.join(command))
+
+        json_response = self._execute_command(command, prompt)
+
+        # Extract content from the "result" field - a well-formed response without one
+        # will not improve on a retry, so it fails straight away
+        if not isinstance(json_response, dict) or "result" not in json_response:
+            error_msg = "Claude JSON output missing 'result' field"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+
+        # Log some stats if available
+        if "cost_usd" in json_response:
+            logger.info("Claude request cost: $%.6f", json_response["cost_usd"])
+        if "duration_ms" in json_response:
+            logger.info("Claude request duration: %.2f seconds", json_response["duration_ms"] / 1000)
+
+        # Extract only the content after the "# Investment Memorandum" heading
+        result = json_response["result"]
+        marker_index = result.find(MEMO_HEADING)
+        if marker_index > 0:
+            result = result[marker_index:]
+
+        if prompt_hash is not None:
+            self._cache_response(prompt_hash, result)
+        return result
 
     def generate_investment_memo(
         self, stock_data: Dict[str, Any], company_name: str = ""
@@ -239,42 +491,62 @@ class ClaudeIntegration:
         if not stock_data:
             raise ValueError("Stock data is empty or None")
 
-        # Extract ticker and company name for logging
-        ticker, extracted_company_name = self._extract_company_info(stock_data, company_name)
+        # Extract ticker and company name for the prompt and logging
+        ticker, full_ticker, extracted_company_name = self._ticker_info(stock_data, company_name)
         current_date = datetime.datetime.now().strftime("%Y-%m-%d")
 
-        # Get full ticker with exchange for logging
-        full_ticker = ""
-        try:
-            exchange = stock_data.get("exchangeSymbol", "")
-            if exchange and ticker:
-                full_ticker = f"{exchange}:{ticker}"
-            else:
-                full_ticker = ticker
-        except:
-            full_ticker = ticker
-
         logger.info(
-            f"Generating investment memo for {full_ticker} ({extracted_company_name}) with stock data"
+            "Generating investment memo for %s (%s) with stock data", full_ticker, extracted_company_name
         )
 
-        # Convert stock data to JSON string
-        stock_json = json.dumps(stock_data, indent=2)
-
-
         # Prepare replacements dict with all required placeholders
         replacements = {
             "TICKER": ticker,
             "COMPANY": extracted_company_name,
             "DATE": current_date,
-            "STOCK_JSON_DATA": stock_json
         }
 
-        # Prepare prompt with all replacements
-        prompt = self._prepare_prompt(self.memo_prompt_path, replacements)
+        prompt_data = _minify_stock_data(stock_data)
+        while True:
+            # Convert stock data to compact JSON; indentation only adds tokens to the prompt,
+            # and sorted keys keep the prompt identical for identical data
+            replacements["STOCK_JSON_DATA"] = orjson.dumps(
+                prompt_data, option=orjson.OPT_SORT_KEYS
+            ).decode("utf-8")
+
+            # Prepare prompt with all replacements
+            prompt = self._prepare_prompt(self._memo_template, replacements)
+
+            # Check the size locally rather than paying for a call that overflows the
+            # context window; drop the least important sections until it fits
+            estimated_tokens = len(prompt) // _CHARS_PER_TOKEN
+            if estimated_tokens <= MAX_PROMPT_TOKENS:
+                break
+
+            section = next((key for key in _COMPACTION_ORDER if key in prompt_data), None)
+            if section is None:
+                raise RuntimeError(
+                    f"Prompt for {full_ticker} is too large (~{estimated_tokens} tokens) "
+                    f"even after dropping optional stock data sections"
+                )
+
+            logger.warning(
+                "Prompt for %s is ~%d tokens, dropping '%s' from stock data",
+                full_ticker,
+                estimated_tokens,
+                section,
+            )
+            del prompt_data[section]
+
+        # Stocks with only minimal data leave little to analyse, so they can be routed
+        # to a cheaper, faster model when one is configured
+        model = None
+        if self.light_model and stock_data.get("is_minimal_data", False):
+            logger.info("Using %s model for %s (minimal data only)", self.light_model, full_ticker)
+            model = self.light_model
 
         # Run Claude and return response
-        return self._run_claude(prompt)
+        return self._run_claude(prompt, model)
 
     def generate_portfolio_allocation(self, memos_data: Dict[str, str], portfolio_data: Dict[str, Dict[str, Any]] = None) -> str:
         """Generate portfolio allocation recommendation using investment memos and current portfolio data
@@ -298,22 +570,33 @@ class ClaudeIntegration:
         current_date = datetime.datetime.now().strftime("%Y-%m-%d")
 
         # Format memos data for the prompt
-        formatted_memos = ""
-        for ticker, memo in memos_data.items():
-            formatted_memos += f"\n\n==== MEMO FOR {ticker} ====\n\n{memo}"
+        formatted_memos = "".join(
+            f"\n\n==== MEMO FOR {ticker} ====\n\n{memo}" for ticker, memo in memos_data.items()
+        )
 
         # Format portfolio data if provided
         formatted_portfolio = ""
         if portfolio_data:
-            # Add CSV header
-            formatted_portfolio = "Ticker,Name,Invested Value (GBP),Current Value (GBP),Result (GBP),Quantity\n"
-
-            # Add each holding as a CSV row
-            for ticker, data in portfolio_data.items():
-                row = f"{ticker},{data['name']},{data['invested_value']:.2f},{data['current_value']:.2f},{data['result']:.2f},{data['quantity']:.6f}\n"
-                formatted_portfolio += row
+            # Write the holdings as CSV so names containing commas are quoted correctly
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow(
+                ["Ticker", "Name", "Invested Value (GBP)", "Current Value (GBP)", "Result (GBP)", "Quantity"]
+            )
+            writer.writerows(
+                [
+                    ticker,
+                    data["name"],
+                    f"{data['invested_value']:.2f}",
+                    f"{data['current_value']:.2f}",
+                    f"{data['result']:.2f}",
+                    f"{data['quantity']:.6f}",
+                ]
+                for ticker, data in portfolio_data.items()
+            )
+            formatted_portfolio = buffer.getvalue()
 
-            logger.info(f"Including {len(portfolio_data)} holdings from current portfolio in allocation")
+            logger.info("Including %d holdings from current portfolio in allocation", len(portfolio_data))
 
         # Prepare replacements for the prompt
         replacements = {
@@ -322,12 +605,12 @@ class ClaudeIntegration:
             "CURRENT_PORTFOLIO": formatted_portfolio
         }
 
-        logger.info(f"Generating portfolio allocation using {len(memos_data)} investment memos")
+        logger.info("Generating portfolio allocation using %d investment memos", len(memos_data))
 
         # Prepare prompt with replacements
-        prompt = self._prepare_prompt(self.portfolio_prompt_path, replacements)
+        prompt = self._prepare_prompt(self._portfolio_template, replacements)
 
         # Run Claude and return response
-        result = self._run_claude(prompt)
+        result = self._run_claude(prompt, use_cache=True)
 
         return result
@@ -16,10 +16,33 @@ a historical record of analyses and enable performance tracking over time.
 
 import os
 import glob
-import json
 import csv
 import datetime
-from typing import Dict, List, Optional, Any, Union, Tuple
+import functools
+import heapq
+import re
+import tempfile
+import threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Set, Union, Tuple
+
+# Stock data and memo filenames: STOCK_FILENAME_YYYYMMDD.json / STOCK_FILENAME_YYYYMMDD.md
+_STOCK_DATA_NAME_RE = re.compile(r"(.+)_(\d{8})\.json")
+_MEMO_NAME_RE = re.compile(r"(.+)_(\d{8})\.md")
+
+# Permissions for new files, following the umask like open(path, "w") does. The umask
+# can only be read by setting it, so do that once at import, before any worker threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_NEW_FILE_MODE = 0o666 & ~_UMASK
+
+
+@functools.lru_cache(maxsize=4096)
+def _stock_filename(ticker: str) -> str:
+    """Convert ticker to a safe filename (memoized - tickers repeat across lookups)"""
+    # Replace : with _ and make uppercase
+    return ticker.replace(":", "_").upper()
 
 
 class FileManager:
@@ -56,12 +79,34 @@ class FileManager:
         self.portfolio_dir = portfolio_dir
         self.data_dir = data_dir
 
-        # Create directories if they don't exist
-        os.makedirs(sws_data_dir, exist_ok=True)
-        os.makedirs(final_memos_dir, exist_ok=True)
-
-        if portfolio_dir:
-            os.makedirs(portfolio_dir, exist_ok=True)
+        # Directory prefixes (with trailing separator) for building per-ticker paths
+        self._sws_data_prefix = os.path.join(sws_data_dir, "")
+        self._final_memos_prefix = os.path.join(final_memos_dir, "")
+
+        # Cached (date, YYYYMMDD) for today, refreshed when the date rolls over; kept
+        # as one tuple so threads sharing the manager never see a mismatched pair
+        self._today = (None, "")
+
+        # Directory indexes built on first use and kept up to date by the save methods,
+        # so per-ticker lookups don't re-list the directories (shared between threads)
+        self._index_lock = threading.Lock()
+        self._stock_data_files = None
+        self._latest_memos = None
+
+        # Create directories if they don't exist (a single stat when they already do)
+        for directory in (sws_data_dir, final_memos_dir, portfolio_dir):
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory, exist_ok=True)
+
+    @property
+    def today(self) -> str:
+        """Today's date as YYYYMMDD, formatted once per day rather than per call"""
+        current_date = datetime.date.today()
+        cached_date, formatted = self._today
+        if current_date != cached_date:
+            formatted = current_date.strftime("%Y%m%d")
+            self._today = (current_date, formatted)
+        return formatted
 
     def _get_stock_filename(self, ticker: str) -> str:
         """Convert ticker to a safe filename
@@ -72,9 +117,47 @@ class FileManager:
         Returns:
             Safe filename string
         """
-        # Replace : with _ and make uppercase
-        return ticker.replace(":", "_").upper()
+        return _stock_filename(ticker)
+
+
+    def _atomic_write(self, filepath: str, content: Union[str, bytes]) -> None:
+        """Write a file atomically
+
+        The content is written to a temporary file in the same directory, flushed
+        to disk, and then renamed over the target. A crash mid-write therefore never
+        leaves a truncated file behind - which matters because an existing memo file
+        is what marks a stock as already processed, and today's stock data file is
+        reused instead of calling the API again.
 
+        Args:
+            filepath: Destination file path
+            content: Text (encoded as UTF-8) or binary content to write
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+
+        directory = os.path.dirname(filepath)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            # Write straight to the descriptor: the content is already a single
+            # blob in memory, so no buffered/text file object is needed
+            try:
+                # mkstemp always creates the file as 0600; give it the mode open() would
+                os.chmod(tmp_path, _NEW_FILE_MODE)
+
+                view = memoryview(content)
+                while view:
+                    view = view[os.write(fd, view):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
 
     def get_current_date_stock_data_file(self, ticker: str) -> Optional[str]:
         """Check if a stock data file with today's date already exists
@@ -86,12 +169,11 @@ class FileManager:
             Path to today's file if it exists, None otherwise
         """
         stock_filename = self._get_stock_filename(ticker)
-        today = datetime.datetime.now().strftime("%Y%m%d")
-        pattern = os.path.join(self.sws_data_dir, f"{stock_filename}_{today}.json")
-        
-        files = glob.glob(pattern)
-        if files:
-            return files[0]
+        filepath = f"{self._sws_data_prefix}{stock_filename}_{self.today}.json"
+
+        with self._index_lock:
+            if filepath in self._stock_data_index().get(stock_filename, ()):
+                return filepath
         return None
         
     def delete_older_stock_data_files(self, ticker: str, keep_file: str) -> None:
@@ -102,16 +184,24 @@ class FileManager:
             keep_file: Full path to the file that should be kept
         """
         stock_filename = self._get_stock_filename(ticker)
-        pattern = os.path.join(self.sws_data_dir, f"{stock_filename}_*.json")
-        
-        files = glob.glob(pattern)
+
+        with self._index_lock:
+            files = list(self._stock_data_index().get(stock_filename, ()))
+
+        remaining = {keep_file}
         for file in files:
             if file != keep_file:
                 try:
                     os.remove(file)
+                except FileNotFoundError:
+                    pass
                 except Exception as e:
                     # Log but continue if a file can't be deleted
                     print(f"Failed to delete older file {file}: {str(e)}")
+                    remaining.add(file)
+
+        with self._index_lock:
+            self._stock_data_index()[stock_filename] = remaining
         
     def save_stock_data(self, ticker: str, data: Dict[str, Any]) -> str:
         """Save stock data to a timestamped JSON file
@@ -124,24 +214,39 @@ class FileManager:
             Path to saved file
         """
         stock_filename = self._get_stock_filename(ticker)
-        timestamp = datetime.datetime.now().strftime("%Y%m%d")
+        timestamp = self.today
 
         # Limit insider transactions to the latest 5 if more than 5 exist
-        if "insiderTransactions" in data and isinstance(data["insiderTransactions"], list) and len(data["insiderTransactions"]) > 5:
-            # Sort by filingDate (if available) or tradeDateMax in descending order
-            if all("filingDate" in tx for tx in data["insiderTransactions"]):
-                data["insiderTransactions"].sort(key=lambda x: x["filingDate"], reverse=True)
-            elif all("tradeDateMax" in tx for tx in data["insiderTransactions"]):
-                data["insiderTransactions"].sort(key=lambda x: x["tradeDateMax"], reverse=True)
+        transactions = data.get("insiderTransactions")
+        if isinstance(transactions, list) and len(transactions) > 5:
+            # Pick the date field present on every transaction in a single pass,
+            # preferring filingDate over tradeDateMax
+            has_filing_date = has_trade_date = True
+            for tx in transactions:
+                if "filingDate" not in tx:
+                    has_filing_date = False
+                if "tradeDateMax" not in tx:
+                    has_trade_date = False
+                if not (has_filing_date or has_trade_date):
+                    break
+
+            date_key = "filingDate" if has_filing_date else "tradeDateMax" if has_trade_date else None
+
+            # Select the latest in descending order; a top-5 selection avoids sorting
+            # the full transaction history
+            if date_key:
+                transactions = heapq.nlargest(5, transactions, key=lambda x: x[date_key])
 
             # Keep only the latest 5 transactions
-            data["insiderTransactions"] = data["insiderTransactions"][:5]
+            data["insiderTransactions"] = transactions[:5]
 
-        filename = f"{stock_filename}_{timestamp}.json"
-        filepath = os.path.join(self.sws_data_dir, filename)
+        filepath = f"{self._sws_data_prefix}{stock_filename}_{timestamp}.json"
 
-        with open(filepath, "w") as f:
-            json.dump(data, f, indent=2)
+        # Kept indented for readability on disk; orjson serializes straight to bytes
+        self._atomic_write(filepath, orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+        with self._index_lock:
+            self._stock_data_index().setdefault(stock_filename, set()).add(filepath)
 
         # Delete older stock data files for this ticker
         self.delete_older_stock_data_files(ticker, filepath)
@@ -159,13 +264,17 @@ class FileManager:
             Path to saved file
         """
         stock_filename = self._get_stock_filename(ticker)
-        timestamp = datetime.datetime.now().strftime("%Y%m%d")
+        timestamp = self.today
+
+        filepath = f"{self._final_memos_prefix}{stock_filename}_{timestamp}.md"
 
-        filename = f"{stock_filename}_{timestamp}.md"
-        filepath = os.path.join(self.final_memos_dir, filename)
+        self._atomic_write(filepath, memo_content)
 
-        with open(filepath, "w") as f:
-            f.write(memo_content)
+        with self._index_lock:
+            latest_memos = self._memo_index()
+            current = latest_memos.get(stock_filename)
+            if current is None or filepath > current:
+                latest_memos[stock_filename] = filepath
 
         return filepath
 
@@ -178,15 +287,76 @@ class FileManager:
         Returns:
             Path to the most recent file, or None if no files exist
         """
-        stock_filename = self._get_stock_filename(ticker)
-        pattern = os.path.join(self.final_memos_dir, f"{stock_filename}_*.md")
-        
-        files = glob.glob(pattern)
-        if not files:
-            return None
-            
-        # Find the most recent file
-        return max(files, key=os.path.getctime)
+        with self._index_lock:
+            return self._memo_index().get(self._get_stock_filename(ticker))
+
+    def prime_indexes(self) -> None:
+        """Scan the stock data and memo directories up front
+
+        Builds both directory indexes before stocks are processed, so per-ticker
+        lookups from the worker threads are answered from memory straight away.
+        """
+        with self._index_lock:
+            self._stock_data_index()
+            self._memo_index()
+
+    def _stock_data_index(self) -> Dict[str, Set[str]]:
+        """Get the stock data file index, scanning the directory on first use
+
+        Must be called with the index lock held.
+
+        Returns:
+            Dictionary with stock filename (e.g. "NASDAQ_AAPL") as key and the set of
+            paths of its stock data files as value
+        """
+        if self._stock_data_files is None:
+            index = {}
+            with os.scandir(self.sws_data_dir) as entries:
+                for entry in entries:
+                    match = _STOCK_DATA_NAME_RE.fullmatch(entry.name)
+                    if match:
+                        index.setdefault(match.group(1), set()).add(entry.path)
+
+            self._stock_data_files = index
+
+        return self._stock_data_files
+
+    def _memo_index(self) -> Dict[str, str]:
+        """Get the latest memo index, scanning the directory on first use
+
+        Must be called with the index lock held.
+
+        Returns:
+            Dictionary with stock filename as key and path to its most recent memo as value
+        """
+        if self._latest_memos is None:
+            self._latest_memos = self._index_memos()
+
+        return self._latest_memos
+
+    def _index_memos(self) -> Dict[str, str]:
+        """Scan the final memos directory once and find the latest memo for every stock
+
+        Memo filenames end in a YYYYMMDD timestamp, so for a given stock the
+        lexicographically greatest name is the most recent memo (no stat() needed).
+
+        Returns:
+            Dictionary with stock filename (e.g. "NASDAQ_AAPL") as key and path to
+            its most recent memo as value
+        """
+        latest = {}
+        with os.scandir(self.final_memos_dir) as entries:
+            for entry in entries:
+                match = _MEMO_NAME_RE.fullmatch(entry.name)
+                if not match:
+                    continue
+
+                stock_filename, timestamp = match.groups()
+                current = latest.get(stock_filename)
+                if current is None or timestamp > current[0]:
+                    latest[stock_filename] = (timestamp, entry.path)
+
+        return {stock_filename: path for stock_filename, (_, path) in latest.items()}
 
     def load_json_data(self, filepath: str) -> Dict[str, Any]:
         """Load JSON data from file
@@ -199,10 +369,12 @@ class FileManager:
 
         Raises:
             FileNotFoundError: If file does not exist
-            json.JSONDecodeError: If file contains invalid JSON
+            orjson.JSONDecodeError: If file contains invalid JSON (a subclass of
+                                    json.JSONDecodeError)
         """
-        with open(filepath, "r") as f:
-            return json.load(f)
+        # Read the whole file in one call and parse the UTF-8 bytes directly
+        with open(filepath, "rb") as f:
+            return orjson.loads(f.read())
 
     def load_memo_content(self, filepath: str) -> str:
         """Load memo content from file
@@ -232,12 +404,25 @@ class FileManager:
         Returns:
             Dictionary with ticker as key and memo content as value
         """
-        memos = {}
+        # Use the memos directory index rather than listing it for every ticker
+        with self._index_lock:
+            latest_memos = dict(self._memo_index())
+
+        memo_paths = {}
         for ticker in tickers:
-            memo_path = self.get_latest_final_memo(ticker)
+            memo_path = latest_memos.get(self._get_stock_filename(ticker))
             if memo_path:
-                memos[ticker] = self.load_memo_content(memo_path)
-        return memos
+                memo_paths[ticker] = memo_path
+
+        # Reading is pure file I/O, so overlap the reads when there are enough memos
+        # to make a thread pool worthwhile
+        if len(memo_paths) < 4:
+            contents = map(self.load_memo_content, memo_paths.values())
+            return dict(zip(memo_paths, contents))
+
+        with ThreadPoolExecutor(max_workers=min(32, len(memo_paths))) as executor:
+            contents = executor.map(self.load_memo_content, memo_paths.values())
+            return dict(zip(memo_paths, contents))
 
     def save_portfolio_allocation(self, allocation_content: str) -> str:
         """Save portfolio allocation to the portfolio directory with timestamp
@@ -262,8 +447,7 @@ class FileManager:
         filename = f"portfolio_allocation_{timestamp}.md"
         filepath = os.path.join(self.portfolio_dir, filename)
 
-        with open(filepath, "w") as f:
-            f.write(allocation_content)
+        self._atomic_write(filepath, allocation_content)
 
         return filepath
         
@@ -311,37 +495,53 @@ class FileManager:
         if not file_path and self.data_dir:
             file_path = self.get_latest_portfolio_csv()
             
-        if not file_path or not os.path.exists(file_path):
+        if not file_path:
             return {}
             
         holdings = {}
         
-        with open(file_path, 'r') as csvfile:
-            reader = csv.DictReader(csvfile)
+        try:
+            csvfile = open(file_path, 'r')
+        except FileNotFoundError:
+            return {}
+
+        with csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, None)
+            if header is None:
+                return {}
+
+            # Resolve column positions once from the header instead of building a dict per row
+            slice_col = header.index("Slice")
+            name_col = header.index("Name")
+            invested_col = header.index("Invested value")
+            value_col = header.index("Value")
+            result_col = header.index("Result")
+            quantity_col = header.index("Owned quantity")
+            row_width = max(slice_col, name_col, invested_col, value_col, result_col, quantity_col) + 1
+
             for row in reader:
-                # Skip the "Total" row
-                if row["Slice"] == "Total":
+                # Skip blank/short rows, the "Total" row, and rows with zero quantity
+                if len(row) < row_width:
                     continue
-                    
-                # Skip empty rows or rows with zero quantity
-                if not row["Slice"] or row["Owned quantity"] == "0":
+
+                ticker = row[slice_col]
+                if not ticker or ticker == "Total" or row[quantity_col] == "0":
                     continue
-                    
-                ticker = row["Slice"]
-                
+
                 # Convert numeric values
-                invested_value = float(row["Invested value"]) if row["Invested value"] else 0.0
-                current_value = float(row["Value"]) if row["Value"] else 0.0
-                result = float(row["Result"]) if row["Result"] else 0.0
-                quantity = float(row["Owned quantity"]) if row["Owned quantity"] else 0.0
-                
+                invested_value = row[invested_col]
+                current_value = row[value_col]
+                result = row[result_col]
+                quantity = row[quantity_col]
+
                 holdings[ticker] = {
-                    "name": row["Name"],
-                    "invested_value": invested_value,
-                    "current_value": current_value,
-                    "result": result,
-                    "quantity": quantity,
+                    "name": row[name_col],
+                    "invested_value": float(invested_value) if invested_value else 0.0,
+                    "current_value": float(current_value) if current_value else 0.0,
+                    "result": float(result) if result else 0.0,
+                    "quantity": float(quantity) if quantity else 0.0,
                     "currency": "GBP"  # All values in CSV are in GBP
                 }
-                
+
         return holdings
\ No newline at end of file
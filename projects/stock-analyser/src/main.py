@@ -13,13 +13,25 @@ This script orchestrates the stock analysis workflow:
 import os
 import sys
 import argparse
+import atexit
 import logging
-from dotenv import load_dotenv
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
 
-from simplywall_api import SimplywallStAPI
-from watchlist_parser import WatchlistParser
-from file_manager import FileManager
-from claude_integration import ClaudeIntegration
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# The pipeline modules (and requests/yaml/orjson behind them) are imported inside
+# main() so --help and argument errors don't pay for loading them
+if TYPE_CHECKING:
+    from simplywall_api import SimplywallStAPI
+    from file_manager import FileManager
+    from claude_integration import ClaudeIntegration
 
 
 # Set up logging
@@ -28,6 +40,104 @@ logging.basicConfig(
 )
 logger = logging.getLogger("stock_analyzer")
 
+# Inline comment after an unquoted .env value, e.g. `KEY=value  # note`
+_ENV_INLINE_COMMENT_RE = re.compile(r"(?:^|\s+)#.*$")
+
+# Project root directory (assuming src/ is in project root)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_log_listener():
+    """Route log records through a queue drained by a background thread
+
+    Worker threads only enqueue records, while a single listener thread performs
+    the actual handler I/O. The listener is stopped (and the queue flushed) at exit.
+    """
+    root_logger = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)
+    root_logger.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def acquire_run_lock(data_dir):
+    """Take an exclusive lock so only one run works on the data directory at a time
+
+    Two overlapping runs would fetch the same stocks and bill the same Claude calls
+    twice. The lock is tied to the open file and released by the OS when the
+    process exits, so a killed run never leaves a stale lock behind.
+
+    Args:
+        data_dir: Data directory shared by runs
+
+    Returns:
+        Open lock file that must stay referenced for the duration of the run,
+        or None if file locking is not supported on this platform
+
+    Raises:
+        RuntimeError: If another run already holds the lock
+    """
+    if fcntl is None:
+        return None
+
+    os.makedirs(data_dir, exist_ok=True)
+    lock_file = open(os.path.join(data_dir, ".run.lock"), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        raise RuntimeError(f"Another stock analyzer run is already using {data_dir}")
+
+    return lock_file
+
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1
+
+    Args:
+        value: Raw command line value
+
+    Returns:
+        Parsed integer
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not an integer of at least 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+
+    return number
+
+
+def positive_float(value):
+    """argparse type for durations that must be greater than 0
+
+    Args:
+        value: Raw command line value
+
+    Returns:
+        Parsed float
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a finite number greater than 0
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid float value: '{value}'")
+
+    # Written as a range check so NaN is rejected too
+    if not 0 < number < float("inf"):
+        raise argparse.ArgumentTypeError(f"must be a finite number greater than 0, got {value}")
+
+    return number
+
 
 def parse_args():
     """Parse command line arguments"""
@@ -50,6 +160,47 @@ def parse_args():
         "--claude-command", help="Command to invoke Claude (default: claude)", default="claude"
     )
 
+    parser.add_argument(
+        "--workers",
+        help="Number of stocks to process concurrently (default: 3)",
+        type=positive_int,
+        default=3,
+    )
+
+    parser.add_argument(
+        "--claude-concurrency",
+        help="Maximum number of Claude calls running at once (default: 3)",
+        type=positive_int,
+        default=3,
+    )
+
+    parser.add_argument(
+        "--claude-calls-per-hour",
+        help="Maximum number of Claude calls per rolling hour (default: unlimited)",
+        type=positive_int,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--claude-timeout",
+        help="Seconds before a single Claude call is killed and retried (default: 900)",
+        type=positive_float,
+        default=900.0,
+    )
+
+    parser.add_argument(
+        "--claude-light-model",
+        help="Cheaper Claude model for stocks with only minimal data, e.g. haiku (default: none)",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--no-claude-cache",
+        help="Always call Claude for the portfolio allocation instead of reusing the cached "
+        "response to an identical prompt (memos are never cached)",
+        action="store_true",
+    )
+
     parser.add_argument("--verbose", help="Enable verbose logging", action="store_true")
 
     parser.add_argument("--env-file", help="Path to .env file (default: .env)", default=".env")
@@ -57,6 +208,43 @@ def parse_args():
     return parser.parse_args()
 
 
+def load_env_file(env_path):
+    """Load KEY=VALUE lines from a .env file into the environment
+
+    The .env file only holds a couple of simple keys, so this handles comment lines,
+    inline comments after unquoted values, an optional `export` prefix and quoted
+    values without python-dotenv's full parser. Variables that are already set are
+    never overridden.
+
+    Args:
+        env_path: Path to the .env file
+    """
+    with open(env_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+
+            key = key.strip()
+            if key.startswith("export "):
+                key = key[len("export "):].strip()
+
+            value = value.strip()
+            if value[:1] in ("'", '"'):
+                # Quoted value - take everything up to the closing quote
+                closing = value.find(value[0], 1)
+                if closing != -1:
+                    value = value[1:closing]
+            else:
+                value = _ENV_INLINE_COMMENT_RE.sub("", value)
+
+            os.environ.setdefault(key, value)
+
+
 def load_api_token(args):
     """Load API token from arguments, environment, or .env file
 
@@ -73,18 +261,21 @@ def load_api_token(args):
     if args.api_token:
         return args.api_token
 
+    # Check environment variable before touching the .env file
+    api_token = os.environ.get("SIMPLYWALL_API_TOKEN")
+    if api_token:
+        return api_token
+
     # Load environment variables from .env file
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_path = os.path.join(project_root, args.env_file)
+    env_path = os.path.join(PROJECT_ROOT, args.env_file)
 
     if os.path.exists(env_path):
-        load_dotenv(env_path)
+        load_env_file(env_path)
         logger.debug(f"Loaded environment variables from {env_path}")
 
-    # Check environment variable
-    api_token = os.environ.get("SIMPLYWALL_API_TOKEN")
-    if api_token:
-        return api_token
+        api_token = os.environ.get("SIMPLYWALL_API_TOKEN")
+        if api_token:
+            return api_token
 
     # No API token found
     raise ValueError(
@@ -96,9 +287,9 @@ def load_api_token(args):
 def process_stock(
     ticker: str,
     company_name: str,
-    api_client: SimplywallStAPI,
-    file_manager: FileManager,
-    claude: ClaudeIntegration,
+    api_client: "SimplywallStAPI",
+    file_manager: "FileManager",
+    claude: "ClaudeIntegration",
     current_index: int = 0,
     total_stocks: int = 0
 ) -> bool:
@@ -124,6 +315,8 @@ def process_stock(
         True if processing was successful, False otherwise
     """
     try:
+        logger.info(f"Processing stock {current_index}/{total_stocks}: {ticker}")
+
         # First check if there's already a memo file for this stock
         memo_file = file_manager.get_latest_final_memo(ticker)
         if memo_file:
@@ -194,6 +387,8 @@ def main():
     # Parse command line arguments
     args = parse_args()
 
+    start_log_listener()
+
     # Set logging level
     if args.verbose:
         logger.setLevel(logging.DEBUG)
@@ -202,18 +397,18 @@ def main():
         # Get API token
         api_token = load_api_token(args)
 
-        # Get project root directory (assuming src/ is in project root)
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        data_dir = os.path.join(project_root, "data")
+        data_dir = os.path.join(PROJECT_ROOT, "data")
+        # Keep a reference to the lock for the rest of the run
+        run_lock = acquire_run_lock(data_dir)
 
         # Resolve paths
-        watchlist_path = os.path.join(project_root, args.watchlist)
+        watchlist_path = os.path.join(PROJECT_ROOT, args.watchlist)
         sws_data_dir = os.path.join(data_dir, "sws_data")
         final_memos_dir = os.path.join(data_dir, "final_memos")
         portfolio_dir = os.path.join(data_dir, "portfolio")
-        prompt_dir = os.path.join(project_root, "prompts")
+        prompt_dir = os.path.join(PROJECT_ROOT, "prompts")
 
-        logger.debug(f"Project root: {project_root}")
+        logger.debug(f"Project root: {PROJECT_ROOT}")
         logger.debug(f"Data dir: {data_dir}")
         logger.debug(f"Watchlist path: {watchlist_path}")
         logger.debug(f"SimplyWall.st data dir: {sws_data_dir}")
@@ -221,71 +416,93 @@ def main():
         logger.debug(f"Portfolio dir: {portfolio_dir}")
         logger.debug(f"Prompt directory: {prompt_dir}")
 
-        # Initialize components
+        from simplywall_api import SimplywallStAPI
+        from watchlist_parser import WatchlistParser
+        from file_manager import FileManager
+        from claude_integration import ClaudeIntegration
+
+        # Initialize components - the API client and Claude integration hold SQLite
+        # connections and an HTTP session, so they are closed however the run ends
         watchlist_parser = WatchlistParser(watchlist_path)
-        api_client = SimplywallStAPI(api_token)
         file_manager = FileManager(sws_data_dir, final_memos_dir, portfolio_dir, data_dir)
-        claude = ClaudeIntegration(prompt_dir, args.claude_command)
-
-        # Parse watchlist
-        tickers = watchlist_parser.parse()
-        total_tickers = len(tickers)
-        logger.info(f"Found {total_tickers} stocks in watchlist")
-
-        # Process each stock
-        successful = 0
-
-        for index, ticker in enumerate(tickers, 1):
-            # Get company name if available
-            company_name = watchlist_parser.get_company_name(ticker)
-
-            # Add progress tracking to the context
-            logger.info(f"Processing stock {index}/{total_tickers}: {ticker}")
-
-            if process_stock(
-                ticker,
-                company_name,
-                api_client,
-                file_manager,
-                claude,
-                current_index=index,
-                total_stocks=total_tickers
-            ):
-                successful += 1
-
-        # Print summary of stock processing
-        logger.info(f"Processed {successful} of {total_tickers} stocks successfully")
-
-        # Generate portfolio allocation only if all stocks were processed successfully
-        if successful == total_tickers:
-            try:
-                logger.info("Starting portfolio allocation generation")
-
-                # Get all the final memos for the stocks in the watchlist
-                memos_data = file_manager.get_all_latest_memos(tickers)
-                memo_count = len(memos_data)
 
-                if memo_count > 0:
-                    # Read portfolio data from CSV
-                    portfolio_data = file_manager.read_portfolio_csv()
-                    if portfolio_data:
-                        logger.info(f"Found current portfolio data with {len(portfolio_data)} holdings")
+        with SimplywallStAPI(
+            api_token,
+            company_cache_path=os.path.join(data_dir, "company_cache.db"),
+            max_connections=args.workers,
+        ) as api_client, ClaudeIntegration(
+            prompt_dir,
+            args.claude_command,
+            args.claude_concurrency,
+            args.claude_calls_per_hour,
+            response_cache_path=None if args.no_claude_cache else os.path.join(data_dir, "claude_cache.db"),
+            light_model=args.claude_light_model,
+            timeout=args.claude_timeout,
+        ) as claude:
+            # Parse watchlist
+            tickers = watchlist_parser.parse()
+            total_tickers = len(tickers)
+            logger.info(f"Found {total_tickers} stocks in watchlist")
+
+            # Index existing stock data and memo files once for the whole watchlist
+            file_manager.prime_indexes()
+
+            # Process stocks concurrently - each stock spends most of its time waiting
+            # on the SimplyWall.st API and the Claude CLI, so threads overlap that latency
+            successful = 0
+
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                futures = [
+                    executor.submit(
+                        process_stock,
+                        ticker,
+                        watchlist_parser.get_company_name(ticker),
+                        api_client,
+                        file_manager,
+                        claude,
+                        current_index=index,
+                        total_stocks=total_tickers
+                    )
+                    for index, ticker in enumerate(tickers, 1)
+                ]
+
+                for future in as_completed(futures):
+                    if future.result():
+                        successful += 1
+
+            # Print summary of stock processing
+            logger.info(f"Processed {successful} of {total_tickers} stocks successfully")
+
+            # Generate portfolio allocation only if all stocks were processed successfully
+            if successful == total_tickers:
+                try:
+                    logger.info("Starting portfolio allocation generation")
+
+                    # Get all the final memos for the stocks in the watchlist
+                    memos_data = file_manager.get_all_latest_memos(tickers)
+                    memo_count = len(memos_data)
+
+                    if memo_count > 0:
+                        # Read portfolio data from CSV
+                        portfolio_data = file_manager.read_portfolio_csv()
+                        if portfolio_data:
+                            logger.info(f"Found current portfolio data with {len(portfolio_data)} holdings")
+                        else:
+                            logger.warning("No portfolio CSV file found - will generate allocation without current holdings")
+
+                        # Generate portfolio allocation with memos and portfolio data
+                        logger.info(f"Generating portfolio allocation from {memo_count} investment memos")
+                        portfolio_allocation = claude.generate_portfolio_allocation(memos_data, portfolio_data)
+
+                        # Save portfolio allocation
+                        portfolio_file = file_manager.save_portfolio_allocation(portfolio_allocation)
+                        logger.info(f"Saved portfolio allocation to {portfolio_file}")
                     else:
-                        logger.warning("No portfolio CSV file found - will generate allocation without current holdings")
-
-                    # Generate portfolio allocation with memos and portfolio data
-                    logger.info(f"Generating portfolio allocation from {memo_count} investment memos")
-                    portfolio_allocation = claude.generate_portfolio_allocation(memos_data, portfolio_data)
+                        logger.warning("No memos found for portfolio allocation - unable to proceed")
 
-                    # Save portfolio allocation
-                    portfolio_file = file_manager.save_portfolio_allocation(portfolio_allocation)
-                    logger.info(f"Saved portfolio allocation to {portfolio_file}")
-                else:
-                    logger.warning("No memos found for portfolio allocation - unable to proceed")
-
-            except Exception as e:
-                logger.error(f"Error generating portfolio allocation: {str(e)}")
-                # Continue even if portfolio allocation fails
+                except Exception as e:
+                    logger.error(f"Error generating portfolio allocation: {str(e)}")
+                    # Continue even if portfolio allocation fails
 
         if successful < total_tickers:
             logger.warning(
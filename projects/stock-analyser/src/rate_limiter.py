@@ -0,0 +1,61 @@
+"""
+Rate Limiter
+
+This module provides a small thread-safe rate limiter used to pace calls to
+external services (the SimplyWall.st API and the Claude CLI).
+
+The limiter keeps a sliding window of call timestamps:
+1. Timestamps older than the window period are discarded on each acquire
+2. If fewer than `max_calls` remain in the window, the call proceeds immediately
+3. Otherwise the caller sleeps until the oldest timestamp leaves the window
+
+Unlike a decorator that sleeps and retries recursively, acquiring a slot costs a
+single monotonic clock read and a few deque operations, and the lock is never
+held while sleeping so other threads can keep checking the window.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """Sliding-window limiter allowing at most `max_calls` calls per `period` seconds"""
+
+    __slots__ = ("max_calls", "period", "_stamps", "_lock")
+
+    def __init__(self, max_calls: int, period: float = 60.0):
+        """Initialize the limiter
+
+        Args:
+            max_calls: Maximum number of calls allowed within the window
+            period: Length of the window in seconds (default: 60)
+
+        Raises:
+            ValueError: If max_calls or period is not positive
+        """
+        if max_calls <= 0 or period <= 0:
+            raise ValueError("max_calls and period must be positive")
+
+        self.max_calls = max_calls
+        self.period = period
+        self._stamps = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call is allowed, then record it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+
+                # Drop calls that have left the window
+                while self._stamps and self._stamps[0] <= now - self.period:
+                    self._stamps.popleft()
+
+                if len(self._stamps) < self.max_calls:
+                    self._stamps.append(now)
+                    return
+
+                wait = self._stamps[0] + self.period - now
+
+            time.sleep(wait)
@@ -19,18 +19,160 @@ The data returned by the API includes:
 - Management and board information
 - Industry classification
 
-API requests are rate-limited, so the client includes retry logic and
-error handling to manage potential issues with API connectivity.
+API requests are rate-limited, so the client paces its own requests with a
+shared sliding-window limiter (safe to use from multiple worker threads). Rate
+limit responses and transient server errors are retried with exponential backoff
+(honouring Retry-After) before an error is raised.
 """
 
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+import functools
 import logging
-from typing import Dict, List, Optional, Any, Union
+import sqlite3
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Any, Union
+
+from rapidfuzz import fuzz, process, utils as fuzz_utils
+
+from rate_limiter import RateLimiter
 
 logger = logging.getLogger("stock_analyzer")
 
 
+def _compact_query(query: str) -> str:
+    """Collapse the whitespace in a GraphQL document
+
+    GraphQL treats runs of whitespace as a single separator, so the indented
+    documents below are kept readable in source but sent without padding.
+    """
+    return " ".join(query.split())
+
+
+_SEARCH_COMPANIES_QUERY = _compact_query("""
+    query searchCompanies($query: String!) {
+        searchCompanies(query: $query) {
+            id
+            name
+            exchangeSymbol
+            tickerSymbol
+            marketCapUSD
+        }
+    }
+""")
+
+# Fields always returned by the detailed company query
+_COMPANY_FIELDS = """
+    id
+    name
+    exchangeSymbol
+    tickerSymbol
+    marketCapUSD
+    primaryIndustry {
+        name
+    }
+    secondaryIndustry {
+        name
+    }
+    market {
+        name
+        iso2
+    }
+"""
+
+# Selection sets for the heavy sections of the detailed company query, in query order
+_COMPANY_SECTION_FIELDS = {
+    "statements": """
+        statements {
+            name
+            title
+            area
+            value
+            description
+        }
+    """,
+    "owners": """
+        owners {
+            name
+            type
+            percentOfSharesOutstanding
+            holdingDate
+        }
+    """,
+    "insiderTransactions": """
+        insiderTransactions {
+            type
+            ownerName
+            ownerType
+            description
+            shares
+            priceMin
+            priceMax
+            transactionValue
+            percentageSharesTraded
+            percentageChangeTransShares
+            isManagementInsider
+            filingDate
+        }
+    """,
+    "members": """
+        members {
+            name
+            title
+            tenure
+            compensation
+        }
+    """,
+}
+
+COMPANY_SECTIONS = frozenset(_COMPANY_SECTION_FIELDS)
+
+
+@functools.lru_cache(maxsize=None)
+def _company_detailed_query(sections: FrozenSet[str]) -> str:
+    """Build the detailed company query selecting only the given sections
+
+    Args:
+        sections: Names of the sections to request (keys of _COMPANY_SECTION_FIELDS)
+
+    Returns:
+        Compacted GraphQL document, built once per distinct set of sections
+    """
+    fields = "".join(
+        selection for name, selection in _COMPANY_SECTION_FIELDS.items() if name in sections
+    )
+    return _compact_query(
+        "query CompanyDetailedQuery($id: ID!) { company(id: $id) { "
+        f"{_COMPANY_FIELDS} {fields}"
+        " } }"
+    )
+
+
+_COMPANY_BY_TICKER_QUERY = _compact_query("""
+    query CompanyByExchangeAndTickerSymbol($exchange: String!, $symbol: String!) {
+        companyByExchangeAndTickerSymbol(exchange: $exchange, tickerSymbol: $symbol) {
+            id
+            name
+            exchangeSymbol
+            tickerSymbol
+            marketCapUSD
+        }
+    }
+""")
+
+_EXCHANGES_QUERY = _compact_query("""
+    query {
+        exchanges {
+            symbol
+            companiesCount
+        }
+    }
+""")
+
+
 class SimplywallStAPI:
     """Client for the SimplyWall.st GraphQL API
 
@@ -104,14 +246,125 @@ class SimplywallStAPI:
 
     BASE_URL = "https://api.simplywall.st/graphql"
 
-    def __init__(self, api_token: str):
+    # Ticker to company lookups rarely change, so cached lookups are reused for 30 days
+    COMPANY_CACHE_TTL = 30 * 24 * 60 * 60
+
+    # Minimum token set similarity (0-100) for the API name to count as the same as the
+    # watchlist name; "Apple Inc." and "Apple, Inc" should not trigger an override
+    NAME_MATCH_THRESHOLD = 85
+
+    # Retries for rate limited (429) and transient server error responses
+    MAX_RETRIES = 5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    # Minimum weighted similarity (0-100) for a search result to be preferred over the
+    # first result when picking the company that best matches the watchlist name
+    SEARCH_MATCH_THRESHOLD = 60
+
+    def __init__(
+        self,
+        api_token: str,
+        requests_per_minute: int = 60,
+        company_cache_path: Optional[str] = None,
+        max_connections: int = 10,
+    ):
         """Initialize the API client with authentication token
 
         Args:
             api_token: SimplyWall.st Pro API token
+            requests_per_minute: Maximum number of API requests per minute across all threads
+            company_cache_path: Optional path to a SQLite database used to persist
+                                ticker to company lookups across runs
+            max_connections: Number of keep-alive connections to pool, which should cover
+                             the number of worker threads sharing the client (default: 10)
         """
         self.api_token = api_token
         self.headers = {"Authorization": f"Bearer {api_token}", "Content-Type": "application/json"}
+        self._rate_limiter = RateLimiter(requests_per_minute, 60.0)
+
+        # Persistent ticker -> company lookup cache (shared between worker threads)
+        self._cache_lock = threading.Lock()
+        self._company_cache = None
+        if company_cache_path:
+            self._company_cache = sqlite3.connect(company_cache_path, check_same_thread=False)
+            self._company_cache.execute("PRAGMA journal_mode=WAL")
+            self._company_cache.execute(
+                "CREATE TABLE IF NOT EXISTS company_lookup "
+                "(lookup_key TEXT PRIMARY KEY, company TEXT NOT NULL, cached_at REAL NOT NULL)"
+            )
+            self._company_cache.commit()
+
+        # One session for all requests so connections to the API are kept alive
+        # and reused instead of paying a new TCP + TLS handshake per query
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+
+        # Size the pool for the worker threads so concurrent queries don't discard
+        # and reopen connections once the default pool of 10 is exhausted. All queries
+        # are reads, so retrying the POST on a 429 or 5xx response is safe
+        retry = Retry(
+            total=self.MAX_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, max_retries=retry)
+        self._session.mount("https://", adapter)
+
+    def __enter__(self) -> "SimplywallStAPI":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release resources held by the client"""
+        self._session.close()
+
+        if self._company_cache is not None:
+            with self._cache_lock:
+                self._company_cache.close()
+                self._company_cache = None
+
+    def _get_cached_company(self, lookup_key: str) -> Optional[Dict[str, Any]]:
+        """Get a previously resolved company from the lookup cache
+
+        Args:
+            lookup_key: Cache key identifying the ticker lookup
+
+        Returns:
+            Cached company information, or None if missing or expired
+        """
+        if self._company_cache is None:
+            return None
+
+        with self._cache_lock:
+            row = self._company_cache.execute(
+                "SELECT company, cached_at FROM company_lookup WHERE lookup_key = ?", (lookup_key,)
+            ).fetchone()
+
+        if row is None or time.time() - row[1] > self.COMPANY_CACHE_TTL:
+            return None
+
+        return orjson.loads(row[0])
+
+    def _cache_company(self, lookup_key: str, company: Dict[str, Any]) -> None:
+        """Store a resolved company in the lookup cache
+
+        Args:
+            lookup_key: Cache key identifying the ticker lookup
+            company: Basic company information returned by the API
+        """
+        if self._company_cache is None:
+            return
+
+        with self._cache_lock:
+            self._company_cache.execute(
+                "INSERT OR REPLACE INTO company_lookup (lookup_key, company, cached_at) VALUES (?, ?, ?)",
+                (lookup_key, orjson.dumps(company).decode(), time.time()),
+            )
+            self._company_cache.commit()
 
     def _execute_query(self, query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
         """Execute a GraphQL query
@@ -131,10 +384,13 @@ class SimplywallStAPI:
 
         payload = {"query": query, "variables": variables}
 
-        response = requests.post(self.BASE_URL, headers=self.headers, data=json.dumps(payload))
+        # Wait for a free slot in the rate limit window before sending
+        self._rate_limiter.acquire()
+
+        response = self._session.post(self.BASE_URL, data=orjson.dumps(payload))
 
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     def search_companies(self, query: str) -> List[Dict[str, Any]]:
         """Search for companies by name or ticker
@@ -145,86 +401,31 @@ class SimplywallStAPI:
         Returns:
             List of matching companies
         """
-        graphql_query = """
-        query searchCompanies($query: String!) {
-            searchCompanies(query: $query) {
-                id
-                name
-                exchangeSymbol
-                tickerSymbol
-                marketCapUSD
-            }
-        }
-        """
-
-        response = self._execute_query(graphql_query, {"query": query})
+        response = self._execute_query(_SEARCH_COMPANIES_QUERY, {"query": query})
         return response.get("data", {}).get("searchCompanies", [])
 
-    def get_company_detailed(self, company_id: str) -> Dict[str, Any]:
+    def get_company_detailed(
+        self, company_id: str, sections: Iterable[str] = COMPANY_SECTIONS
+    ) -> Dict[str, Any]:
         """Get comprehensive company information by ID
 
         Args:
             company_id: SimplyWall.st company UUID
+            sections: Heavy sections to include, from COMPANY_SECTIONS
+                      (default: all of them). Basic company fields are always returned.
 
         Returns:
             Detailed company information
+
+        Raises:
+            ValueError: If an unknown section is requested
         """
-        graphql_query = """
-        query CompanyDetailedQuery($id: ID!) {
-            company(id: $id) {
-                id
-                name
-                exchangeSymbol
-                tickerSymbol
-                marketCapUSD
-                primaryIndustry {
-                    name
-                }
-                secondaryIndustry {
-                    name
-                }
-                market {
-                    name
-                    iso2
-                }
-                statements {
-                    name
-                    title
-                    area
-                    value
-                    description
-                }
-                owners {
-                    name
-                    type
-                    percentOfSharesOutstanding
-                    holdingDate
-                }
-                insiderTransactions {
-                    type
-                    ownerName
-                    ownerType
-                    description
-                    shares
-                    priceMin
-                    priceMax
-                    transactionValue
-                    percentageSharesTraded
-                    percentageChangeTransShares
-                    isManagementInsider
-                    filingDate
-                }
-                members {
-                    name
-                    title
-                    tenure
-                    compensation
-                }
-            }
-        }
-        """
+        sections = frozenset(sections)
+        unknown = sections - COMPANY_SECTIONS
+        if unknown:
+            raise ValueError(f"Unknown company sections: {', '.join(sorted(unknown))}")
 
-        response = self._execute_query(graphql_query, {"id": company_id})
+        response = self._execute_query(_company_detailed_query(sections), {"id": company_id})
         return response.get("data", {}).get("company", {})
 
     def get_company_by_ticker(self, exchange: str, ticker_symbol: str) -> Dict[str, Any]:
@@ -237,57 +438,28 @@ class SimplywallStAPI:
         Returns:
             Basic company information including ID for further queries
         """
-        graphql_query = """
-        query CompanyByExchangeAndTickerSymbol($exchange: String!, $symbol: String!) {
-            companyByExchangeAndTickerSymbol(exchange: $exchange, tickerSymbol: $symbol) {
-                id
-                name
-                exchangeSymbol
-                tickerSymbol
-                marketCapUSD
-            }
-        }
-        """
-
         response = self._execute_query(
-            graphql_query, {"exchange": exchange, "symbol": ticker_symbol}
+            _COMPANY_BY_TICKER_QUERY, {"exchange": exchange, "symbol": ticker_symbol}
         )
         return response.get("data", {}).get("companyByExchangeAndTickerSymbol", {})
 
-    def get_company_data(self, ticker_info: str, company_name: str = "") -> Dict[str, Any]:
-        """Get comprehensive company data from a ticker string
+    def _find_company(self, ticker_info: str, company_name: str = "") -> Dict[str, Any]:
+        """Find the company matching a ticker string via the API
 
         Args:
             ticker_info: Ticker string in format "EXCHANGE:SYMBOL" or just "SYMBOL"
-                         If only symbol is provided, will attempt to find the right exchange
             company_name: Optional company name from watchlist to help find correct match
 
         Returns:
-            Complete company data including financial metrics, statements, etc.
-            The returned dictionary contains these key components:
-            - id: SimplyWall.st company UUID
-            - name: Company name
-            - exchangeSymbol: Exchange identifier (e.g., "NasdaqGS")
-            - tickerSymbol: Stock ticker symbol
-            - marketCapUSD: Market capitalization in USD
-            - primaryIndustry/secondaryIndustry: Industry classification
-            - market: Exchange market information
-            - statements: Array of financial statements with these fields:
-                - name: Metric identifier
-                - title: Human-readable metric name
-                - area: Category (Income, Balance Sheet, etc.)
-                - value: Numerical value
-                - description: Detailed description often containing additional data
-            - owners: Major shareholders with ownership percentages
-            - insiderTransactions: Recent insider buying/selling
-            - members: Management team and board members
+            Basic company information (id, name, exchangeSymbol, tickerSymbol, marketCapUSD),
+            or an empty dict if no company was found
 
         Raises:
-            ValueError: If company cannot be found
+            ValueError: If the company search fails or returns no results
         """
         # Parse ticker info
-        if ":" in ticker_info:
-            exchange, symbol = ticker_info.split(":", 1)
+        exchange, separator, symbol = ticker_info.partition(":")
+        if separator:
             # Get company ID
             company = self.get_company_by_ticker(exchange, symbol)
         else:
@@ -308,34 +480,69 @@ class SimplywallStAPI:
 
             # If company_name is provided, try to find best match
             if company_name and len(search_results) > 1:
-                best_match = None
-                highest_score = 0
-
-                for result in search_results:
-                    # Extract company names for comparison
-                    result_name = result.get("name", "").lower()
-                    watch_name = company_name.lower()
-
-                    # Simple scoring: 2 points for exact match, 1 point for partial match
-                    score = 0
-                    if watch_name == result_name:
-                        score = 2  # Exact match
-                    elif watch_name in result_name or result_name in watch_name:
-                        score = 1  # Partial match
-
-                    # Update best match if this score is higher
-                    if score > highest_score:
-                        highest_score = score
-                        best_match = result
-
-                # If we found a match, use it; otherwise use first result
-                if best_match:
-                    company = best_match
+                # The watchlist name is the same for every result, so lowercase it once
+                watch_name = company_name.lower()
+                result_names = [result.get("name", "").lower() for result in search_results]
+
+                if watch_name in result_names:
+                    # Exact match - no need for fuzzy scoring
+                    company = search_results[result_names.index(watch_name)]
                 else:
-                    company = search_results[0]
+                    # Otherwise take the closest name (scored in C), falling back to the first result
+                    match = process.extractOne(
+                        watch_name,
+                        result_names,
+                        scorer=fuzz.WRatio,
+                        processor=fuzz_utils.default_process,
+                        score_cutoff=self.SEARCH_MATCH_THRESHOLD,
+                    )
+                    company = search_results[match[2]] if match else search_results[0]
             else:
                 company = search_results[0]  # Take the first result
 
+        return company
+
+    def get_company_data(self, ticker_info: str, company_name: str = "") -> Dict[str, Any]:
+        """Get comprehensive company data from a ticker string
+
+        Args:
+            ticker_info: Ticker string in format "EXCHANGE:SYMBOL" or just "SYMBOL"
+                         If only symbol is provided, will attempt to find the right exchange
+            company_name: Optional company name from watchlist to help find correct match
+
+        Returns:
+            Complete company data including financial metrics, statements, etc.
+            The returned dictionary contains these key components:
+            - id: SimplyWall.st company UUID
+            - name: Company name
+            - exchangeSymbol: Exchange identifier (e.g., "NasdaqGS")
+            - tickerSymbol: Stock ticker symbol
+            - marketCapUSD: Market capitalization in USD
+            - primaryIndustry/secondaryIndustry: Industry classification
+            - market: Exchange market information
+            - statements: Array of financial statements with these fields:
+                - name: Metric identifier
+                - title: Human-readable metric name
+                - area: Category (Income, Balance Sheet, etc.)
+                - value: Numerical value
+                - description: Detailed description often containing additional data
+            - owners: Major shareholders with ownership percentages
+            - insiderTransactions: Recent insider buying/selling
+            - members: Management team and board members
+
+        Raises:
+            ValueError: If company cannot be found
+        """
+        # Resolve the ticker to a company, reusing the cached lookup when possible
+        lookup_key = f"{ticker_info}|{company_name}"
+        company = self._get_cached_company(lookup_key)
+        if company:
+            logger.debug(f"Using cached company lookup for '{ticker_info}'")
+        else:
+            company = self._find_company(ticker_info, company_name)
+            if company and company.get("id"):
+                self._cache_company(lookup_key, company)
+
         # If we didn't get a company, raise error
         if not company:
             raise ValueError(f"Could not find company matching '{ticker_info}'")
@@ -376,11 +583,18 @@ class SimplywallStAPI:
             return minimal_data
 
         # Override company name if provided from watchlist and significantly different
-        if company_name and detailed_data.get("name") and company_name.lower() != detailed_data["name"].lower():
-            # Still log the original name for reference
+        if company_name and detailed_data.get("name"):
             original_name = detailed_data["name"]
-            detailed_data["originalName"] = original_name
-            detailed_data["name"] = company_name
+            similarity = fuzz.token_set_ratio(company_name, original_name, processor=fuzz_utils.default_process)
+
+            if similarity < self.NAME_MATCH_THRESHOLD:
+                # Still log the original name for reference
+                logger.warning(
+                    f"API name '{original_name}' differs from watchlist name '{company_name}' "
+                    f"for '{ticker_info}', using watchlist name"
+                )
+                detailed_data["originalName"] = original_name
+                detailed_data["name"] = company_name
 
         return detailed_data
 
@@ -390,14 +604,5 @@ class SimplywallStAPI:
         Returns:
             List of exchanges with symbol and company count
         """
-        graphql_query = """
-        query {
-            exchanges {
-                symbol
-                companiesCount
-            }
-        }
-        """
-
-        response = self._execute_query(graphql_query)
+        response = self._execute_query(_EXCHANGES_QUERY)
         return response.get("data", {}).get("exchanges", [])
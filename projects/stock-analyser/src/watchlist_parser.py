@@ -26,10 +26,17 @@ Each stock entry should follow the format: `TICKER (Company Name)` where:
 """
 
 from typing import List, Dict, Optional, Tuple
-import os
 import yaml
 import re
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
+# Stock entry in the form "TICKER (Company Name)"
+_STOCK_ENTRY_RE = re.compile(r'([A-Z0-9]+)\s*\((.*)\)')
+
 
 class WatchlistParser:
     """Parser for stock watchlist files in YAML format"""
@@ -54,12 +61,14 @@ class WatchlistParser:
             FileNotFoundError: If watchlist file does not exist
             yaml.YAMLError: If YAML parsing fails
         """
-        if not os.path.exists(self.watchlist_path):
+        try:
+            file = open(self.watchlist_path, "r")
+        except FileNotFoundError:
             raise FileNotFoundError(f"Watchlist file not found: {self.watchlist_path}")
 
-        with open(self.watchlist_path, "r") as file:
+        with file:
             try:
-                watchlist_data = yaml.safe_load(file)
+                watchlist_data = yaml.load(file, Loader=_YamlLoader)
             except yaml.YAMLError as e:
                 raise yaml.YAMLError(f"Error parsing YAML in watchlist file: {str(e)}")
 
@@ -81,7 +90,7 @@ class WatchlistParser:
 
             # Extract ticker and company name using pattern:
             # Format: "TICKER (Company Name)"
-            match = re.match(r'([A-Z0-9]+)\s*\((.*)\)', stock_entry)
+            match = _STOCK_ENTRY_RE.match(stock_entry)
             if match:
                 ticker = match.group(1).strip()
                 company_name = match.group(2).strip()
@@ -120,8 +129,8 @@ class WatchlistParser:
         Returns:
             Dictionary with 'exchange' and 'symbol' keys
         """
-        if ":" in ticker:
-            exchange, symbol = ticker.split(":", 1)
+        exchange, separator, symbol = ticker.partition(":")
+        if separator:
             return {"exchange": exchange, "symbol": symbol}
         else:
             # No exchange specified
@@ -1,15 +1,53 @@
 import requests
+from requests.adapters import HTTPAdapter
+import orjson
 import os
 import time as tm
 import pandas as pd
-import json
 from dotenv import load_dotenv
 from datetime import date, datetime
+from operator import itemgetter
 
 load_dotenv()  # will search for .env file in local folder and load variables
 
 API_KEY = os.getenv("API_KEY")
 
+# The only export columns the analysis reads
+EXPORT_COLUMNS = [
+    "Action",
+    "Time",
+    "Ticker",
+    "Name",
+    "No. of shares",
+    "Price / share",
+    "Currency (Price / share)",
+    "Result",
+    "Total",
+]
+
+# One session for every API call so the TLS connection is reused
+SESSION = requests.Session()
+SESSION.headers.update({"Authorization": API_KEY})
+SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# Categories of the "Action" column, so rows are dispatched on a small integer
+# rather than a chain of string comparisons
+CASH_TRANSFER, BUY, SELL, DIVIDEND, INTEREST = range(5)
+UNKNOWN_ACTION = -1
+ACTION_CATEGORIES = {
+    "Deposit": CASH_TRANSFER,
+    "Withdrawal": CASH_TRANSFER,
+    "Market buy": BUY,
+    "Limit buy": BUY,
+    "Market sell": SELL,
+    "Limit sell": SELL,
+    "Dividend (Ordinary)": DIVIDEND,
+    "Dividend (Dividends paid by us corporations)": DIVIDEND,
+    "Dividend (Dividends paid by foreign corporations)": DIVIDEND,
+    "Dividend (Dividend)": DIVIDEND,
+    "Interest on cash": INTEREST,
+}
+
 
 def post_export_csv(dateFrom, dateTo):
     url = "https://live.trading212.com/api/v0/history/exports"
@@ -23,18 +61,16 @@ def post_export_csv(dateFrom, dateTo):
         "timeFrom": dateFrom,
         "timeTo": dateTo,
     }
-    headers = {"Content-Type": "application/json", "Authorization": API_KEY}
-    response = requests.post(url, json=payload, headers=headers)
-    data = response.json()
+    response = SESSION.post(url, json=payload)
+    data = orjson.loads(response.content)
     print(data)
     tm.sleep(30)
 
 
 def get_exports_list():
     url = "https://live.trading212.com/api/v0/history/exports"
-    headers = {"Authorization": API_KEY}
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    response = SESSION.get(url)
+    data = orjson.loads(response.content)
     print(data)
     tm.sleep(60)
 
@@ -45,68 +81,80 @@ def main():
     pd.options.display.max_rows = 9999
     df1 = pd.read_csv(
         "exports/from_2023-01-01_to_2024-01-01_MTcyOTI4MzIxODczMQ.csv",
+        usecols=EXPORT_COLUMNS,
     )
     df2 = pd.read_csv(
         "exports/from_2024-01-01_to_2025-01-01_MTcyOTI4MzI1NTIyMA.csv",
+        usecols=EXPORT_COLUMNS,
     )
     df = pd.concat([df1, df2], axis=0, ignore_index=True)
 
     time_series = []
+    # Positions are only ever appended and then updated in place, so every snapshot
+    # shares this one list rather than copying it per row
+    new_positions = []
+    # Open positions keyed by ticker; the position dicts are shared with the snapshots
+    positions_by_ticker = {}
+    # Running totals, carried from row to row
+    total_deposit = 0
+    total_value = 0
+    total_realised_p_l = 0
+    total_dividend = 0
+    total_interest = 0
+    total_gain = 0
 
-    for index, row in df.iterrows():
-        action = row["Action"]
-        time = row["Time"]
-        ticker = row["Ticker"]
-        name = row["Name"]
-        no_of_shares = row["No. of shares"]
-        price_per_share = row["Price / share"]
-        currency_price_per_share = row["Currency (Price / share)"]
-        result = row["Result"]
-        total = row["Total"]
+    # Categorise every action in one vectorised pass rather than per row
+    categories = (
+        df["Action"].map(ACTION_CATEGORIES).fillna(UNKNOWN_ACTION).astype(int).tolist()
+    )
 
-        prev_data = time_series[index - 1] if index > 0 else {}
-        prev_total_deposit = (
-            prev_data["total_deposit"] if bool(prev_data) is True else 0
-        )
-        prev_total_value = prev_data["total_value"] if bool(prev_data) is True else 0
-        prev_total_realised_p_l = (
-            prev_data["total_realised_p_l"] if bool(prev_data) is True else 0
-        )
-        prev_total_dividend = (
-            prev_data["total_dividend"] if bool(prev_data) is True else 0
-        )
-        prev_total_interest = (
-            prev_data["total_interest"] if bool(prev_data) is True else 0
-        )
-        prev_total_gain = prev_data["total_gain"] if bool(prev_data) is True else 0
-        prev_positions = prev_data["positions"] if bool(prev_data) is True else []
-        new_total_deposit = prev_total_deposit
-        new_total_value = prev_total_value
-        new_total_realised_p_l = prev_total_realised_p_l
-        new_total_dividend = prev_total_dividend
-        new_total_interest = prev_total_interest
-        new_total_gain = prev_total_gain
-        new_positions = prev_positions[:]
-        position = next((x for x in new_positions if x["ticker"] == ticker), None)
+    # Walk the columns in parallel instead of building a Series per row with
+    # iterrows(); tolist() yields plain Python values, as iterrows() did
+    rows = zip(
+        categories,
+        df["Action"].tolist(),
+        df["Time"].tolist(),
+        df["Ticker"].tolist(),
+        df["Name"].tolist(),
+        df["No. of shares"].tolist(),
+        df["Price / share"].tolist(),
+        df["Currency (Price / share)"].tolist(),
+        df["Result"].tolist(),
+        df["Total"].tolist(),
+    )
+
+    for (
+        category,
+        action,
+        time,
+        ticker,
+        name,
+        no_of_shares,
+        price_per_share,
+        currency_price_per_share,
+        result,
+        total,
+    ) in rows:
+        position = positions_by_ticker.get(ticker)
 
-        if action == "Deposit" or action == "Withdrawal":
-            new_total_deposit = new_total_deposit + total
-            new_total_value = new_total_value + total
-        elif action == "Market buy" or action == "Limit buy":
+        if category == CASH_TRANSFER:
+            total_deposit += total
+            total_value += total
+        elif category == BUY:
             if position is None:
-                new_positions.append(
-                    {
-                        "ticker": ticker,
-                        "name": name,
-                        "no_of_shares": no_of_shares,
-                        "average_price_per_share": price_per_share,
-                        "currency_average_price_per_share": currency_price_per_share,
-                        "total_realised_p_l": 0,
-                        "total_dividend": 0,
-                        "total_inflow": total,
-                        "overall_gain": 0,
-                    }
-                )
+                new_position = {
+                    "ticker": ticker,
+                    "name": name,
+                    "no_of_shares": no_of_shares,
+                    "average_price_per_share": price_per_share,
+                    "currency_average_price_per_share": currency_price_per_share,
+                    "total_realised_p_l": 0,
+                    "total_dividend": 0,
+                    "total_inflow": total,
+                    "overall_gain": 0,
+                }
+                new_positions.append(new_position)
+                positions_by_ticker[ticker] = new_position
             else:
                 position["average_price_per_share"] = round(
                     (
@@ -120,7 +168,7 @@ def main():
                     position["no_of_shares"] + no_of_shares, 10
                 )
                 position["total_inflow"] = round(position["total_inflow"] + total, 2)
-        elif action == "Market sell" or action == "Limit sell":
+        elif category == SELL:
             if position is None:
                 print("Cant find position for market sell " + ticker)
             else:
@@ -130,28 +178,23 @@ def main():
                 position["total_realised_p_l"] = round(
                     position["total_realised_p_l"] + result, 2
                 )
-                new_total_realised_p_l += result
-                new_total_gain += result
-                new_total_value += result
-        elif (
-            action == "Dividend (Ordinary)"
-            or action == "Dividend (Dividends paid by us corporations)"
-            or action == "Dividend (Dividends paid by foreign corporations)"
-            or action == "Dividend (Dividend)"
-        ):
+                total_realised_p_l += result
+                total_gain += result
+                total_value += result
+        elif category == DIVIDEND:
             if position is None:
                 print("Cant find position for dividend " + ticker)
             else:
                 position["total_dividend"] = round(
                     position["total_dividend"] + total, 2
                 )
-                new_total_dividend += total
-                new_total_gain += total
-                new_total_value += total
-        elif action == "Interest on cash":
-            new_total_interest += total
-            new_total_gain += total
-            new_total_value += total
+                total_dividend += total
+                total_gain += total
+                total_value += total
+        elif category == INTEREST:
+            total_interest += total
+            total_gain += total
+            total_value += total
         else:
             print(action)
             break
@@ -161,39 +204,42 @@ def main():
                 position["total_realised_p_l"] + position["total_dividend"]
             ) / position["total_inflow"]
 
+        # Totals are carried unrounded and only rounded for the snapshot
         time_series.append(
             {
                 "time": time,
-                "total_deposit": round(new_total_deposit, 2),
-                "total_value": round(new_total_value, 2),
-                "total_realised_p_l": round(new_total_realised_p_l, 2),
-                "total_dividend": round(new_total_dividend, 2),
-                "total_interest": round(new_total_interest, 2),
-                "total_gain": round(new_total_gain, 2),
+                "total_deposit": round(total_deposit, 2),
+                "total_value": round(total_value, 2),
+                "total_realised_p_l": round(total_realised_p_l, 2),
+                "total_dividend": round(total_dividend, 2),
+                "total_interest": round(total_interest, 2),
+                "total_gain": round(total_gain, 2),
                 "positions": new_positions,
             }
         )
 
     url = "https://live.trading212.com/api/v0/equity/portfolio"
-    headers = {"Authorization": API_KEY}
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    response = SESSION.get(url)
+    data = orjson.loads(response.content)
     tm.sleep(5)
 
-    position = next((x for x in new_positions if x["ticker"] == ticker), None)
-
     last_line = time_series[-1]
     final_positions = []
 
+    # Group the live holdings by quantity once, so each position only scans the
+    # holdings with exactly its share count
+    holdings_by_quantity = {}
+    for holding in data:
+        holdings_by_quantity.setdefault(holding["quantity"], []).append(holding)
+
     for position in last_line["positions"]:
         unrealised_p_l = 0
         if position["no_of_shares"] > 0:
             current_ticker_data = next(
                 (
                     x
-                    for x in data
-                    if x["quantity"] == position["no_of_shares"]
-                    and abs(x["averagePrice"] - position["average_price_per_share"]) < 1
+                    for x in holdings_by_quantity.get(position["no_of_shares"], ())
+                    if abs(x["averagePrice"] - position["average_price_per_share"]) < 1
                 ),
                 None,
             )
@@ -224,16 +270,15 @@ def main():
         )
 
     url = "https://live.trading212.com/api/v0/equity/account/cash"
-    headers = {"Authorization": API_KEY}
-    response = requests.get(url, headers=headers)
-    account_data = response.json()
+    response = SESSION.get(url)
+    account_data = orjson.loads(response.content)
 
     total_unrealised_p_l = account_data["ppl"]
     total_overall_gain = (last_line["total_gain"] + account_data["ppl"]) / last_line[
         "total_deposit"
     ]
 
-    from_date = pd.to_datetime(df.iloc[0]["Time"])
+    from_date = pd.to_datetime(df["Time"].iat[0])
     years = (datetime.now().date() - from_date.date()).days / 365.25
     cagr = pow(1 + total_overall_gain, 1 / years) - 1
 
@@ -249,12 +294,12 @@ def main():
         "total_overall_gain": round(total_overall_gain * 100, 2),
         "cagr": round(cagr * 100, 2),
         "positions": sorted(
-            final_positions, key=lambda x: x["total_inflow"], reverse=True
+            final_positions, key=itemgetter("total_inflow"), reverse=True
         ),
     }
 
-    with open("data.json", "w") as f:
-        json.dump(summary, f, indent=4)
+    with open("data.json", "wb") as f:
+        f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
 
 
 main()